@@ -1,7 +1,17 @@
 #!/usr/bin/env python3
 
+import sys
+import weakref
+from collections import namedtuple
 from enum import Enum
-from types import MappingProxyType
+
+__all__ = [
+        "Severity",
+        "Colors",
+        "Styles",
+        "SeverityInfo",
+        "Messages"
+    ]
 
 class Severity(Enum):
     COOL     = 1
@@ -10,6 +20,9 @@ class Severity(Enum):
     FATAL    = 4
 
 class Colors():
+    # Escape sequences by color name.
+    # Treat this as read-only: the escape sequences used by Messages are
+    # resolved from it at import time, so later changes wouldn't show.
     _COLORS = {
         "NONE": "",
         "RESET": "\033[0m",
@@ -18,13 +31,11 @@ class Colors():
         "RED": "\033[91m"
     }
 
-    COLORS = MappingProxyType(_COLORS)
-
+    # Messages doesn't call this: escape sequences for each severity level
+    # are resolved once at import time. Kept for external callers.
     @classmethod
     def getCode(cls, name):
-        if name not in cls.COLORS:
-            return None
-        return cls.COLORS[name]
+        return cls._COLORS.get(name)
 
 class Styles(Enum):
     PLAIN   = 0
@@ -38,21 +49,168 @@ SeverityInfo = {
         Severity.FATAL:    {"icon": "❌", "label": "[FATAL] ",   "color": "RED"}
     }
 
+_LevelMeta = namedtuple("_LevelMeta", "icon label color_code")
+
+# SeverityInfo flattened into one _LevelMeta per level.
+# Only used at import time, to build _FORMATS.
+# Color names are resolved to their escape sequences here rather than on
+# every message.
+_METAS = {
+        level: _LevelMeta(
+            info["icon"],
+            info["label"],
+            Colors._COLORS[info["color"]]
+        )
+        for level, info in SeverityInfo.items()
+    }
+RESET = Colors._COLORS["RESET"]
+
+# Text written before and after a message, for each style and level.
+# Formatting a message is then a single f-string, whatever the style.
+_FORMATS = {
+        Styles.PLAIN: {level: ("", "\n") for level in _METAS},
+        Styles.COLORS: {
+            level: (meta.color_code, RESET + "\n")
+            for level, meta in _METAS.items()
+        },
+        Styles.ICONS: {
+            level: (meta.icon + " ", "\n") for level, meta in _METAS.items()
+        }
+    }
+
+# Size of the output buffer used by Messages(buffered = True)
+BUFFER_SIZE = 65536
+
 class Messages():
     defaults = {
         "severity_level": Severity.INFO,
         "style": Styles.ICONS
     }
 
+    def __init__(self, buffered = False):
+        # By default messages are written to stdout as they come, so they
+        # interleave correctly with the output of other programs.
+        # With buffered=True they are collected in a larger buffer and
+        # written in batches. The buffer is flushed when it's full, when a
+        # FATAL message is shown, and at exit.
+        # Buffering needs stdout's file descriptor. If stdout was replaced by
+        # an object without one, for example to capture output, messages
+        # are not buffered.
+        if buffered:
+            try:
+                fileno = sys.stdout.fileno()
+            except (AttributeError, OSError, ValueError):
+                buffered = False
+        # The buffered stream is binary: affixes are encoded once here, so
+        # only the message itself is encoded when it's shown.
+        # If stdout's encoding can't represent some of them (for example
+        # the icons in cp1252), messages are not buffered either. Unbuffered
+        # output only fails if such a message is actually shown.
+        if buffered:
+            self._encoding = sys.stdout.encoding
+            self._errors = sys.stdout.errors
+            try:
+                self._formats = {
+                        style: {
+                            level: (
+                                prefix.encode(self._encoding, self._errors),
+                                suffix.encode(self._encoding, self._errors)
+                            )
+                            for level, (prefix, suffix) in formats.items()
+                        }
+                        for style, formats in _FORMATS.items()
+                    }
+            except UnicodeEncodeError:
+                buffered = False
+        if buffered:
+            sys.stdout.flush()
+            self._out = open(
+                    fileno,
+                    "wb",
+                    buffering = BUFFER_SIZE,
+                    closefd = False
+                )
+            self._write = self._write_bytes
+            self._print_message = self._print_bytes
+            # Flush the buffer when this instance is collected, or at exit
+            # if it's still alive; then the stream is released.
+            # The stream's own finalizer is not enough: if the instance is
+            # collected as part of a reference cycle, the underlying file
+            # may be finalized before the buffer is flushed.
+            weakref.finalize(self, self._out.flush)
+        else:
+            # Not bound to a stream: sys.stdout is looked up on every write,
+            # like print() does, so redirecting it later is honoured
+            self._out = None
+            self._formats = _FORMATS
+            self._write = self._write_text
+            self._print_message = self._print_text
+        self.update_defaults()
+
+    # Take a snapshot of the defaults, so show_message() doesn't read them
+    # from the dict on every call.
+    # Call this again after changing Messages.defaults, or after assigning
+    # a defaults dict to an instance.
+    def update_defaults(self):
+        self._default_severity_level = self.defaults["severity_level"]
+        self._default_style = self.defaults["style"]
+        # Affixes for a message that uses both defaults, and for info().
+        # They are None if the defaults need show_message()'s warnings.
+        self._default_affixes = None
+        self._info_affixes = None
+        formats = self._formats.get(self._default_style)
+        if formats is not None:
+            if isinstance(self._default_severity_level, Severity):
+                self._default_affixes = formats.get(self._default_severity_level)
+            self._info_affixes = formats[Severity.INFO]
+
+    def flush(self):
+        if self._out is None:
+            sys.stdout.flush()
+        else:
+            self._out.flush()
+
+    def _write_text(self, text):
+        sys.stdout.write(text)
+
+    def _write_bytes(self, text):
+        self._out.write(text.encode(self._encoding, self._errors))
+
+    # _print_text() and _print_bytes() are the two implementations of
+    # _print_message(), chosen in __init__().
+    # affixes is the (prefix, suffix) pair from self._formats, already
+    # resolved by the caller.
+    # A FATAL message is usually the last thing we show before exiting,
+    # so it must not stay in the buffer.
+    def _print_text(self, message, severity_level, affixes):
+        out = sys.stdout
+        out.write(f"{affixes[0]}{message}{affixes[1]}")
+        if severity_level is Severity.FATAL:
+            out.flush()
+
+    def _print_bytes(self, message, severity_level, affixes):
+        self._out.write(b"".join((
+                affixes[0],
+                f"{message}".encode(self._encoding, self._errors),
+                affixes[1]
+            )))
+        if severity_level is Severity.FATAL:
+            self._out.flush()
+
     def print_message(self, message, severity_level, style):
-        if style == Styles.PLAIN:
-            print(message)
-        elif style == Styles.COLORS:
-            color_start = Colors.getCode(SeverityInfo[severity_level]["color"])
-            color_end = Colors.getCode("RESET")
-            print(color_start + message + color_end)
-        elif style == Styles.ICONS:
-            print(SeverityInfo[severity_level]["icon"] + " " + message)
+        self._print_message(
+                message,
+                severity_level,
+                self._formats[style][severity_level]
+            )
+
+    # Show an INFO message in the default style
+    def info(self, message):
+        if self._info_affixes is None:
+            # The default style is not valid, show_message() will say so
+            self.show_message(message, Severity.INFO)
+        else:
+            self._print_message(message, Severity.INFO, self._info_affixes)
 
     def show_message(
             self,
@@ -60,25 +218,47 @@ class Messages():
             severity_level = None,
             style = None
         ):
+        # Most messages use both defaults, and for those everything has
+        # been resolved in advance
+        if (
+                severity_level is None and style is None
+                and self._default_affixes is not None
+            ):
+            self._print_message(
+                    message,
+                    self._default_severity_level,
+                    self._default_affixes
+                )
+            return True
         # set defaults
         if severity_level is None:
-            severity_level = self.defaults["severity_level"]
+            severity_level = self._default_severity_level
         if style is None:
-            style = self.defaults["style"]
+            style = self._default_style
         # If severity_level is not declared in Severity, something is wrong,
         # so we emit a warning.
         # But we don't return, because we might still be able to print the
         # original message.
         if not isinstance(severity_level, Severity):
-            print(f"⚠️ Undeclared severity level: {severity_level}")
+            self._write(f"⚠️ Undeclared severity level: {severity_level}\n")
+        # If style is not in Styles, we print a warning and then we print
+        # the message as is.
+        formats = self._formats.get(style)
+        if formats is None:
+            self._write(f"⚠️ Unhandled style: {style}\n")
+            self._write(f"{message}\n")
+            return False
         # If severity_level is not in SecurityInfo, we print a warning
         # and then we print the message as is.
         # This might mean that we have two warnings, which is intended.
-        if severity_level not in SeverityInfo:
-            print(f"⚠️ Unhandled severity level: {severity_level}")
-            print(message)
+        # The level is looked up once, and the result is used both to
+        # validate it and to format the message.
+        affixes = formats.get(severity_level)
+        if affixes is None:
+            self._write(f"⚠️ Unhandled severity level: {severity_level}\n")
+            self._write(f"{message}\n")
             return False
         else:
             # The message should be properly handled based on its security_level
-            self.print_message(message, severity_level, style)
+            self._print_message(message, severity_level, affixes)
             return True
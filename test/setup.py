@@ -20,148 +20,150 @@ import pathlib
 import argparse
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../python_libs')))
-from messages import Severity, show_message
+from messages import Messages, Severity
+
+# Directory of this script, where the Compose file and .env live
+SCRIPT_DIR = pathlib.Path(__file__).resolve().parent
+COMPOSE_FILE = str(SCRIPT_DIR / "docker-compose.yml")
+ENV_FILE = SCRIPT_DIR / ".env"
+ENV_EXAMPLE_FILE = SCRIPT_DIR / ".env.example"
+
+messages = Messages()
 
 
 def check_docker():
     """Check if Docker is installed and available."""
-    try:
-        result = subprocess.run(
-            ["docker", "--version"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False
-        )
-        
-        if result.returncode == 0:
-            show_message(Severity.INFO, "Docker is installed")
-            return True
-            
-        show_message(Severity.FATAL, "Docker is not installed")
-        print("Please install Docker: https://docs.docker.com/get-docker/")
-        return False
-        
-    except Exception as e:
-        show_message(Severity.FATAL, f"Error checking Docker: {e}")
-        return False
+    # Looking for the executable in PATH is enough to know that Docker is
+    # installed, and unlike running it, doesn't start a new process
+    if shutil.which("docker") is not None:
+        messages.show_message("Docker is installed", Severity.INFO)
+        return True
 
+    messages.show_message("Docker is not installed", Severity.FATAL)
+    sys.stdout.write("Please install Docker: https://docs.docker.com/get-docker/\n")
+    return False
 
-def check_docker_compose():
-    """Check if Docker Compose is available."""
-    # First try Docker Compose V2 (part of Docker CLI as 'docker compose')
-    try:
-        result = subprocess.run(
-            ["docker", "compose", "version"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False
-        )
-        
-        if result.returncode == 0:
-            show_message(Severity.INFO, "Docker Compose (V2) is available")
-            return True, ["docker", "compose"]
-    except Exception:
-        pass
-            
-    # Try standalone Docker Compose (V1)
+
+def start_probe(command):
+    """Start a command quietly in the background.
+
+    Return its Popen object, or None if it couldn't be started.
+    """
+    executable = shutil.which(command[0])
+    if executable is None:
+        return None
+    # Passing the full path of the executable and close_fds=False lets
+    # subprocess start the command with posix_spawn() where available,
+    # which is cheaper than fork() + exec(). Python creates fds as
+    # non-inheritable, so close_fds=False doesn't leak them to the child.
     try:
-        result = subprocess.run(
-            ["docker-compose", "--version"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False
+        return subprocess.Popen(
+            [executable, *command[1:]],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=False
         )
-        
-        if result.returncode == 0:
-            show_message(Severity.INFO, "Docker Compose (V1) is available")
-            return True, ["docker-compose"]
-    except Exception:
-        pass
-        
-    show_message(Severity.FATAL, "Docker Compose is not available")
-    print("Please install Docker Compose: https://docs.docker.com/compose/install/")
-    return False, None
+    except OSError:
+        return None
+
+
+def probe_docker_compose():
+    """Start probing Docker Compose V2, return the probe for check_docker_compose()."""
+    # Docker Compose V2 is a plugin of the Docker CLI ('docker compose'),
+    # not an executable in PATH, so it can only be detected by running it.
+    # The process is only started here, and runs while other checks show
+    # their messages; check_docker_compose() waits for its result.
+    return start_probe(["docker", "compose", "version"])
+
+
+def check_docker_compose(v2_probe):
+    """Check if Docker Compose is available, using the probe_docker_compose() probe.
+
+    Return the command that runs Docker Compose, or None.
+    """
+    # V2 is preferred when both are available
+    if v2_probe is not None and v2_probe.wait() == 0:
+        messages.show_message("Docker Compose (V2) is available", Severity.INFO)
+        return ["docker", "compose"]
+
+    # Standalone Docker Compose (V1) is an executable: looking it up in PATH
+    # doesn't need a new process
+    if shutil.which("docker-compose") is not None:
+        messages.show_message("Docker Compose (V1) is available", Severity.INFO)
+        return ["docker-compose"]
+
+    messages.show_message("Docker Compose is not available", Severity.FATAL)
+    sys.stdout.write("Please install Docker Compose: https://docs.docker.com/compose/install/\n")
+    return None
 
 
 def clean_environment(compose_cmd, remove_env=False):
     """Clean up Docker environment by removing containers, networks, and volumes."""
-    # Get the current script directory
-    script_dir = pathlib.Path(__file__).parent.absolute()
-    
     try:
-        show_message(Severity.WARN, "Cleaning up Docker environment...")
+        messages.show_message("Cleaning up Docker environment...", Severity.WARN)
         result = subprocess.run(
-            compose_cmd + ["-f", str(script_dir / "docker-compose.yml"), "down", "--remove-orphans", "-v"],
+            [*compose_cmd, "-f", COMPOSE_FILE, "down", "--remove-orphans", "-v"],
             check=False
         )
         
         if result.returncode == 0:
-            show_message(Severity.INFO, "Docker environment cleaned successfully")
+            messages.show_message("Docker environment cleaned successfully", Severity.INFO)
         else:
-            show_message(Severity.WARN, f"Docker environment cleanup exited with code: {result.returncode}")
+            messages.show_message(f"Docker environment cleanup exited with code: {result.returncode}", Severity.WARN)
         
         # Remove .env file if force-clean option is used
         if remove_env:
-            env_file = script_dir / ".env"
-            if env_file.exists():
-                env_file.unlink()
-                show_message(Severity.INFO, ".env file removed")
+            if os.path.isfile(ENV_FILE):
+                ENV_FILE.unlink()
+                messages.show_message(".env file removed", Severity.INFO)
     
-    except Exception as e:
-        show_message(Severity.WARN, f"Error during cleanup: {e}")
+    except OSError as e:
+        messages.show_message(f"Error during cleanup: {e}", Severity.WARN)
 
 
 def ensure_env_file():
     """Make sure .env file exists, create from .env.example if not."""
-    # Get the current script directory
-    script_dir = pathlib.Path(__file__).parent.absolute()
-    env_file = script_dir / ".env"
-    env_example = script_dir / ".env.example"
-
-    if env_file.exists():
-        show_message(Severity.INFO, ".env file exists")
+    if os.path.isfile(ENV_FILE):
+        messages.show_message(".env file exists", Severity.INFO)
         return True
     
-    if not env_example.exists():
-        show_message(Severity.FATAL, "Neither .env nor .env.example file found")
+    if not os.path.isfile(ENV_EXAMPLE_FILE):
+        messages.show_message("Neither .env nor .env.example file found", Severity.FATAL)
         return False
     
     try:
-        # Copy .env.example to .env
-        shutil.copy2(env_example, env_file)
-        show_message(Severity.INFO, "Created .env file from .env.example")
-        show_message(Severity.WARN, "You may want to edit .env file to customize settings")
+        # Copy .env.example to .env. Only the contents are needed, not the
+        # example's timestamps and permissions, so use copyfile() rather
+        # than copy2(). On Linux it copies in the kernel with sendfile().
+        # Don't hard link: editing .env must not change .env.example.
+        shutil.copyfile(ENV_EXAMPLE_FILE, ENV_FILE)
+        messages.show_message("Created .env file from .env.example", Severity.INFO)
+        messages.show_message("You may want to edit .env file to customize settings", Severity.WARN)
         return True
-    except Exception as e:
-        show_message(Severity.FATAL, f"Error creating .env file: {e}")
+    except OSError as e:
+        messages.show_message(f"Error creating .env file: {e}", Severity.FATAL)
         return False
 
 
 def run_docker_compose(compose_cmd):
     """Run the Docker Compose file."""
-    # Get the current script directory
-    script_dir = pathlib.Path(__file__).parent.absolute()
-    
     try:
         # Run docker-compose up with detached mode
-        show_message(Severity.COOL, "Starting Docker containers...")
+        messages.show_message("Starting Docker containers...", Severity.COOL)
         result = subprocess.run(
-            compose_cmd + ["-f", str(script_dir / "docker-compose.yml"), "up", "-d"],
+            [*compose_cmd, "-f", COMPOSE_FILE, "up", "-d"],
             check=False
         )
         
         if result.returncode == 0:
-            show_message(Severity.INFO, "Docker containers started successfully")
+            messages.show_message("Docker containers started successfully", Severity.INFO)
             return True
         else:
-            show_message(Severity.FATAL, f"Failed to start Docker containers (exit code: {result.returncode})")
+            messages.show_message(f"Failed to start Docker containers (exit code: {result.returncode})", Severity.FATAL)
             return False
             
-    except Exception as e:
-        show_message(Severity.FATAL, f"Error running Docker Compose: {e}")
+    except OSError as e:
+        messages.show_message(f"Error running Docker Compose: {e}", Severity.FATAL)
         return False
 
 
@@ -178,14 +180,18 @@ def parse_arguments():
 def main():
     """Main function to run the setup process."""
     args = parse_arguments()
-    
+
+    # Probing Docker Compose starts a process, so it runs in the background
+    # while Docker is checked. The checks still report in order.
+    v2_probe = probe_docker_compose()
+
     # Check for Docker first
     if not check_docker():
         sys.exit(1)
     
     # Check for Docker Compose (needed because older Docker versions don't include Compose)
-    compose_available, compose_cmd = check_docker_compose()
-    if not compose_available:
+    compose_cmd = check_docker_compose(v2_probe)
+    if compose_cmd is None:
         sys.exit(1)
     
     # Handle clean and force-clean options
@@ -200,7 +206,7 @@ def main():
     if not run_docker_compose(compose_cmd):
         sys.exit(1)
     
-    show_message(Severity.INFO, "Setup completed successfully")
+    messages.show_message("Setup completed successfully", Severity.INFO)
     sys.exit(0)
 
 